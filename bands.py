@@ -1,30 +1,22 @@
 from constants import IMAGE_QUALITY_STRINGS
 from constants import QA_STRING
 from constants import MTL_STRING
+from identifiers import GEOTIFF_EXTENSION
 from identifiers import LANDSAT_BANDS
 from identifiers import LANDSAT_IDENTIFIERS
 from messages import MESSAGE_UNKNOWN_LANDSAT_IDENTIFIER
 import os
-import glob
 import re
 import grass.script as grass
 from identify import identify_product_collection
 
+IMAGE_QUALITY_MTL_RE = re.compile(
+        '|'.join(IMAGE_QUALITY_STRINGS + [MTL_STRING])
+)
+BAND_NUMERAL_RE = re.compile(r'_B(\d+)\.')
 
-def find_existing_band(band):
-    """
-    Check if band exists in the current mapset
-
-    Parameter "element": 'raster', 'raster_3d', 'vector'
-    """
-    result = grass.find_file(name=band, element='cell', mapset='.')
-    if result['file']:
-        # grass.verbose(_("Band {band} exists".format(band=band)))
-        return True
-    else:
-        return False
 
-def match_band_filenames(bands, scene):
+def match_band_filenames(bands, scene, filenames=None):
     """
     Retrieve filenames of user requested bands from a Landsat scene
 
@@ -40,6 +32,10 @@ def match_band_filenames(bands, scene):
     scene :
         Landsat scene directory
 
+    filenames :
+        GeoTIFF filenames to match against, instead of the files inside the
+        scene directory
+
     Returns
     -------
         Returns list of filenames of user requested bands
@@ -54,16 +50,22 @@ def match_band_filenames(bands, scene):
     except:
         grass.fatal(_(MESSAGE_UNKNOWN_LANDSAT_IDENTIFIER.format(scene=scene)))
 
-    band_template = identify_product_collection(os.path.basename(scene))
+    # read the scene directory once, keep GeoTIFF files only
+    if filenames is None:
+        with os.scandir(scene) as entries:
+            filenames = [entry.name for entry in entries]
+    geotiff_filenames = [
+            filename for filename in filenames
+            if filename.endswith(GEOTIFF_EXTENSION)
+    ]
+
     requested_filenames = []
     for band in bands:
-        for filename in os.listdir(scene):
-            template = regular_expression_template.format(band_pattern=band)
-            pattern = re.compile(template)
+        template = regular_expression_template.format(band_pattern=band)
+        pattern = re.compile(template)
+        for filename in geotiff_filenames:
             if pattern.match(filename):
-                absolute_filename = scene + '/' + filename
-                requested_filename = os.path.basename(glob.glob(absolute_filename)[0])
-                requested_filenames.append(requested_filename)
+                requested_filenames.append(filename)
     # print "Requested bands:"
     # print('\n'.join(map(str, requested_bands)))
     return sort_band_filenames(requested_filenames)
@@ -72,6 +74,7 @@ def retrieve_band_filenames(
         bands,
         spectral_sets,
         scene,
+        filenames=None,
     ):
     """
     """
@@ -89,6 +92,7 @@ def retrieve_band_filenames(
     band_filenames = match_band_filenames(
                 bands=bands,
                 scene=scene,
+                filenames=filenames,
             )
     return band_filenames
 
@@ -101,50 +105,51 @@ def list_band_sets(spectral_sets, scene):
         requested_bands.extend(bands)
     return list(set(requested_bands))
 
+def band_sort_key(filename):
+    """
+    Sort key for band filenames: band numerals first, in numerical order,
+    followed by non-numeral bands such as the QA layer
+    """
+    numeral = BAND_NUMERAL_RE.search(filename)
+    return (int(numeral.group(1)) if numeral else float('inf'), filename)
+
 def sort_band_filenames(band_filenames):
     """
     """
-    filenames = sorted(band_filenames, key=lambda item:
-            (int(item.partition('_B')[2].partition('.')[0])
-                if item.partition('_B')[2].partition('.')[0].isdigit()
-                else float('inf'), item))
+    filenames = sorted(band_filenames, key=band_sort_key)
     return filenames
 
 def get_name_band(scene, filename, single_mapset=False):
     """
+    Return the raster map name and the band of a GeoTIFF filename, as
+    retrieved by match_band_filenames()
     """
-    absolute_filename = os.path.join(scene, filename)
+    # filenames are pre-filtered for the GeoTIFF extension, slice it off
+    stem = filename[:-len(GEOTIFF_EXTENSION)]
 
-    # detect image quality strings in filenames
+    # detect image quality and metadata strings in filenames, in one pass
     # source: https://stackoverflow.com/q/7351744/1172302
-    if any(string in absolute_filename for string in IMAGE_QUALITY_STRINGS):
-        name = "".join((os.path.splitext(absolute_filename)[0].rsplit('_'))[-1])
+    detected_strings = set(IMAGE_QUALITY_MTL_RE.findall(stem))
 
     # keep only the last part of the filename
-    else:
-        name = os.path.splitext(filename)[0].rsplit('_')[-1]
+    name = stem.rpartition('_')[2]
 
     # found a wrongly named *MTL.TIF file in LE71610432005160ASN00
-    if MTL_STRING in absolute_filename:  # use grass.warning(_("..."))?
+    if MTL_STRING in detected_strings:  # use grass.warning(_("..."))?
         message_fatal = "Detected an MTL file with the .TIF extension!"
         message_fatal += "\nPlease, rename the extension to .txt and retry."
         grass.fatal(_(message_fatal))
 
     # is it the QA layer?
-    elif (QA_STRING) in absolute_filename:
+    elif QA_STRING in detected_strings:
         band = name
 
-    # is it a two-digit multispectral band?
-    elif len(name) == 3 and name[0] == 'B' and name[-1] == '0':
-        band = int(name[1:3])
-
-    # what is this for?
-    elif len(name) == 3 and name[-1] == '0':
-        band = int(name[1:2])
-
-    # what is this for?
-    elif len(name) == 3 and name[-1] != '0':
-        band = int(name[1:3])
+    # is it a two-digit band?  what is 'name[1:2]' for?
+    elif len(name) == 3:
+        if name[0] != 'B' and name[-1] == '0':
+            band = int(name[1:2])
+        else:
+            band = int(name[1:3])
 
     # is it a single-digit band?
     else:
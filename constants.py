@@ -1,6 +1,6 @@
-MONTHS = {'01': 'jan', '02': 'feb', '03': 'mar', '04': 'apr', '05': 'may',
-          '06': 'jun', '07': 'jul', '08': 'aug', '09': 'sep', '10': 'oct',
-          '11': 'nov', '12': 'dec'}
+# indexed by month number, 1 to 12
+MONTHS = (None, 'Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug',
+          'Sep', 'Oct', 'Nov', 'Dec')
 
 DATE_STRINGS = ['DATE_ACQUIRED', 'ACQUISITION_DATE']
 TIME_STRINGS = ['SCENE_CENTER_TIME', 'SCENE_CENTER_SCAN_TIME']
@@ -10,4 +10,9 @@ IMAGE_QUALITY_STRINGS = ['QA', 'VCID']
 QA_STRING = 'QA'  # Merge with above?  # FIXME
 MTL_STRING = 'MTL'
 HORIZONTAL_LINE = 79 * '-' + '\n'
-MEMORY_DEFAULT = '300'
+MEMORY_DEFAULT = 300
+BAND_IMPORT_WORKERS = 4
+UNPACK_AHEAD_SCENES = 2
+TAR_COPY_BUFFER_SIZE = 2 * 1024 * 1024
+GZIP_READ_BUFFER_SIZE = 1024 * 1024
+VSITAR_PREFIX = '/vsitar/'
@@ -1,18 +1,116 @@
+import atexit
 import os
+from concurrent.futures import ThreadPoolExecutor
+from constants import BAND_IMPORT_WORKERS
 from helpers import run
-from identifiers import GEOTIFF_EXTENSION
+from messages import MESSAGE_EXISTS_OVERWRITING
+from messages import MESSAGE_EXISTS_SKIPPING
 from metadata import copy_mtl_in_cell_misc
+from metadata import list_rasters_in_mapset
 from timestamp import get_timestamp
 from timestamp import set_timestamp
+from timestamp import build_r_timestamp
 from timestamp import build_tgis_timestamp
 from timestamp import simple_timestamp
 import grass.script as grass
 from grass.pygrass.modules.shortcuts import general as g
 from grass.pygrass.modules.shortcuts import raster as r
 from bands import get_name_band
-from bands import find_existing_band
 from bands import sort_band_filenames
 
+# opened once, shared by all g.mapset calls
+DEVNULL = open(os.devnull, 'w')
+atexit.register(DEVNULL.close)
+
+
+def import_geotiff(
+        filename,
+        band,
+        parameters,
+        memory,
+        mapset=None,
+        existing_bands=frozenset(),
+        link_geotiffs=False,
+        skip_import=True,
+        timestamp=None,
+        force_timestamp=False,
+        do_not_timestamp=False,
+    ):
+    """
+    Imports (or links to) a single GeoTIFF band and timestamps it
+
+    Parameters
+    ----------
+    filename :
+        GeoTIFF file name of the band
+
+    band :
+        Band identifier
+
+    parameters :
+        Parameters for r.in.gdal or r.external
+
+    memory :
+        See options for r.in.gdal, in MB
+
+    mapset :
+        Name of the mapset imported to, to write timestamps directly in
+
+    existing_bands :
+        Names of the raster maps in the target Mapset, to check against if
+        skipping or overwriting existing bands
+
+    Returns
+    -------
+    message, stamp_message :
+        Verbose message on the band and message on force-stamping it, if any,
+        to be reported along with the rest of the bands of the scene
+    """
+    name = parameters['output']
+    stamp_message = None
+    # communicate input band and source file name
+    message = f'{band}\t{filename}'
+
+    if (
+            skip_import
+            and name in existing_bands
+            and not grass.overwrite()
+    ):
+
+        if force_timestamp:
+            set_timestamp(name, timestamp, mapset)
+            stamp_message = f'   >>> Force-stamp {timestamp} @ band {name}'
+
+        return f'{message}{MESSAGE_EXISTS_SKIPPING}', stamp_message
+
+    if (
+            grass.overwrite()
+            and name in existing_bands
+    ):
+        if force_timestamp:
+            set_timestamp(name, timestamp, mapset)
+            stamp_message = f'   >>> Force-stamp {timestamp} @ band {name}'
+
+        message = f'{message}{MESSAGE_EXISTS_OVERWRITING}'
+
+    if link_geotiffs:
+        # What happens with the '--overwrite' flag?
+        # Check if it can be retrieved.
+        r.external(**parameters)
+
+    else:
+        if memory:
+            parameters['memory'] = memory
+        # try:
+        r.in_gdal(**parameters)
+
+        # except CalledModuleError:
+            # grass.fatal(_("Unable to read GDAL dataset {s}".format(s=scene)))
+
+    if not do_not_timestamp:
+        set_timestamp(name, timestamp, mapset)
+
+    return message, stamp_message
 
 def import_geotiffs(
         scene,
@@ -32,6 +130,7 @@ def import_geotiffs(
         do_not_timestamp=False,
         skip_microseconds=False,
         copy_mtl=True,
+        geotiff_sources=None,
     ):
     """
     Imports all bands (GeoTIF format) of a Landsat scene be it Landsat 5,
@@ -51,7 +150,8 @@ def import_geotiffs(
         Name of mapset to import to
 
     memory :
-        See options for r.in.gdal
+        Cache memory for the scene, in MB, shared among its concurrent band
+        imports. See options for r.in.gdal
 
     prefix :
         Input scene name prefix string
@@ -64,119 +164,110 @@ def import_geotiffs(
 
     list_timestamps :
         Boolean True or False
+
+    geotiff_sources :
+        Dictionary mapping band filenames to the path GDAL reads them from,
+        if other than inside the scene directory
     """
     if not single_mapset:
         mapset = os.path.basename(scene)
 
-    message = str()
-    if not any(x for x in (list_bands, list_timestamps)):
-        message = f'Date\t\tTime\t\tTimezone\n{simple_timestamp(timestamp)}\n\n'
-        message += f'Target Mapset\n@{mapset}\n\n'
+    if list_timestamps:
+        return
+
+    if list_bands:
+        bands = '\n'.join(
+                f'{get_name_band(scene, filename)[1]}\t{filename}'
+                for filename in band_filenames
+        )
+        g.message(f'Band\tFilename\n{bands}')
+        return
+
+    header = (
+            f'Date\t\tTime\t\tTimezone\n{simple_timestamp(timestamp)}\n\n'
+            f'Target Mapset\n@{mapset}\n\n'
+            'Band\tFilename\n'
+    )
 
-    if not list_timestamps:
-        message += 'Band\tFilename\n'
-        g.message(message, flags='v')
+    # create Mapset of interest, if it doesn't exist
+    run(
+            'g.mapset',
+            flags='c',
+            mapset=mapset,
+            stderr = DEVNULL,
+    )
+
+    # list existing raster maps once, only if required
+    existing_bands = frozenset()
+    if skip_import or grass.overwrite():
+        existing_bands = list_rasters_in_mapset(mapset)
+
+    # import parameters common to all bands
+    flags = 'o' if override_projection else ''
 
     # loop over files inside a "Landsat" directory
     # sort band numerals, source: https://stackoverflow.com/a/2669523/1172302
+    parameters_list = []
     for filename in band_filenames:
 
-        # if not GeoTIFF, keep on working
-        if os.path.splitext(filename)[-1] != GEOTIFF_EXTENSION:
-            continue
-
         # use the full path name to the file
         name, band = get_name_band(scene, filename, single_mapset)
         band_title = f'band {band}'
+        if geotiff_sources:
+            absolute_filename = geotiff_sources[filename]
+        else:
+            absolute_filename = os.path.join(scene, filename)
+
+        # sort import parameters
+        parameters = dict(
+                input = absolute_filename,
+                output = name,
+                flags = flags,
+                title = band_title,
+                quiet = True,
+        )
+        parameters_list.append((filename, band, parameters))
 
-        if not list_timestamps:
-            message_overwriting = '\t [ Exists, overwriting]'
-            # communicate input band and source file name
-            message = f'{band}\t{filename}'
-            if skip_import:
-                # message for skipping import
-                message_skipping = '\t [ Exists, skipping ]'
+    # GDAL reads run in independent r.in.gdal/r.external processes
+    workers = min(BAND_IMPORT_WORKERS, len(parameters_list) or 1)
 
-        if not any(x for x in (list_bands, list_timestamps)):
-            absolute_filename = os.path.join(scene, filename)
-            # sort import parameters
-            parameters = dict(
-                    input = absolute_filename,
-                    output = name,
-                    flags = '',
-                    title = band_title,
-                    quiet = True,
-            )
-            if override_projection:
-                parameters['flags'] += 'o'
-
-            # create Mapset of interest, if it doesn't exist
-            devnull = open(os.devnull, 'w')
-            run(
-                    'g.mapset',
-                    flags='c',
-                    mapset=mapset,
-                    stderr = devnull,
-            )
-            if (
-                    skip_import
-                    and find_existing_band(name)
-                    and not grass.overwrite()
-            ):
-
-                if force_timestamp:
-                    set_timestamp(name, timestamp)
-                    g.message(f'   >>> Force-stamp {timestamp} @ band {name}')
-
-                message_skipping = message + message_skipping
-                g.message(message_skipping, flags='v')
-                pass
-
-            else:
-                if (
-                        grass.overwrite()
-                        and find_existing_band(name)
-                ):
-                    if force_timestamp:
-                        set_timestamp(name, timestamp)
-                        g.message(f'   >>> Force-stamp {timestamp} @ band {name}')
-
-                    message_overwriting = message + message_overwriting
-                    g.message(message_overwriting, flags='v')
-                    pass
-
-                if (skip_import and not find_existing_band(name)):
-                    # FIXME
-                    # communicate input band and source file name
-                    message = f'{band}\t{filename}'
-                    g.message(message, flags='v')
-
-                if link_geotiffs:
-                    # What happens with the '--overwrite' flag?
-                    # Check if it can be retrieved.
-                    r.external(**parameters)
-
-                else:
-                    if memory:
-                        parameters['memory'] = memory
-                    # try:
-                    r.in_gdal(**parameters)
-
-                    # except CalledModuleError:
-                        # grass.fatal(_("Unable to read GDAL dataset {s}".format(s=scene)))
-
-                if not do_not_timestamp:
-                    set_timestamp(name, timestamp)
+    # the timestamp string is the same for all bands of the scene
+    timestamp = build_r_timestamp(timestamp)
 
-        else:
-            pass
+    # share the scene's cache memory among concurrent r.in.gdal processes,
+    # also GDAL's block cache, inherited by each r.in.gdal/r.external run
+    if memory:
+        memory = max(memory // workers, 1)
+        os.environ['GDAL_CACHEMAX'] = str(memory)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        messages = list(executor.map(
+            lambda job: import_geotiff(
+                *job,
+                memory=memory,
+                mapset=mapset,
+                existing_bands=existing_bands,
+                link_geotiffs=link_geotiffs,
+                skip_import=skip_import,
+                timestamp=timestamp,
+                force_timestamp=force_timestamp,
+                do_not_timestamp=do_not_timestamp,
+                ),
+            parameters_list,
+        ))
+
+    # report on all bands of the scene at once, one g.message per scene
+    bands = '\n'.join(message for message, _stamp in messages)
+    g.message(f'{header}{bands}', flags='v')
+    stamp_messages = [stamp for _message, stamp in messages if stamp]
+    if stamp_messages:
+        g.message('\n'.join(stamp_messages))
 
     # copy MTL
-    if not list_bands and not list_timestamps:
-        copy_mtl_in_cell_misc(
-                scene,
-                mapset,
-                list_timestamps,
-                single_mapset,
-                copy_mtl
-        )
+    copy_mtl_in_cell_misc(
+            scene,
+            mapset,
+            list_timestamps,
+            single_mapset,
+            copy_mtl
+    )
@@ -1,3 +1,5 @@
+import os
+import shutil
 import grass.script as grass
 
 def run(cmd, **kwargs):
@@ -5,3 +7,12 @@ def run(cmd, **kwargs):
     Pass quiet flag to grass commands
     """
     grass.run_command(cmd, quiet=True, **kwargs)
+
+def isolate_gisrc(directory):
+    """
+    Point the current (worker) process to its own copy of the GISRC file.
+    Switching Mapsets via g.mapset, then, does not affect other processes.
+    """
+    gisrc = os.path.join(directory, f'gisrc.{os.getpid()}')
+    shutil.copyfile(os.environ['GISRC'], gisrc)
+    os.environ['GISRC'] = gisrc
@@ -69,6 +69,12 @@
 #%  description: Skip import of existing band(s)
 #%end
 
+#%flag
+#%  key: z
+#%  description: Read bands directly from tar.gz files (via GDAL's /vsitar/), unpack metadata files only
+#%  guisection: Input
+#%end
+
 #%rules
 # %  excludes: -s, --o
 #% excludes: -l, -s
@@ -208,6 +214,18 @@
 #%  answer: 300
 #%end
 
+#%option
+#%  key: nprocs
+#%  key_desc: Processes
+#%  label: Number of scenes to import in parallel
+#%  description: 0 for as many as available CPU cores. Ignored if importing all scenes in one Mapset
+#%  type: integer
+#%  multiple: no
+#%  required: no
+#%  options: 0-
+#%  answer: 0
+#%end
+
 # required librairies
 import os
 import sys
@@ -220,8 +238,11 @@ sys.path.insert(
 )
 
 import shutil
-import glob
 import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 # import shlex
 from datetime import datetime
 import atexit
@@ -229,8 +250,11 @@ import grass.script as grass
 from grass.exceptions import CalledModuleError
 from grass.pygrass.modules.shortcuts import general as g
 from grass.pygrass.modules.shortcuts import raster as r
+from constants import GRASS_VERBOSITY_LELVEL_3
 from constants import HORIZONTAL_LINE
 from constants import MEMORY_DEFAULT
+from identifiers import TGZ_EXTENSION
+from helpers import isolate_gisrc
 from messages import MESSAGE_LIST_TIMESTAMPS_HEADLINE
 from metadata import is_mtl_in_cell_misc
 from metadata import copy_mtl_in_cell_misc
@@ -238,12 +262,154 @@ from timestamp import build_tgis_timestamp
 from timestamp import get_timestamp
 from bands import retrieve_band_filenames
 from tar import list_files_in_tar
-from tar import extract_tgz
+from tar import unpack_metadata
+from tar import unpack_scene
+from tar import unpack_scenes_ahead
 from geotiff import import_geotiffs
 
 grass_environment = grass.gisenv()
 MAPSET = grass_environment['MAPSET']
 
+def import_scene(
+        landsat_scene,
+        pool=None,
+        mapset=MAPSET,
+        memory=MEMORY_DEFAULT,
+        bands=[''],
+        spectral_sets=[''],
+        prefix=None,
+        list_bands=False,
+        list_timestamps=False,
+        tgis_output=None,
+        override_projection=False,
+        copy_mtl=True,
+        link_geotiffs=False,
+        skip_import=False,
+        remove_untarred=False,
+        force_timestamp=False,
+        do_not_timestamp=False,
+        skip_microseconds=False,
+        single_mapset=False,
+        multiple_scenes=False,
+        untarred=False,
+        read_from_tar=False,
+        decompression_threads=None,
+    ):
+    """
+    Decompress and unpack (if required), timestamp and import the bands of a
+    single Landsat scene.  All parameters are passed explicitly, so that the
+    function can be dispatched to a pool of worker processes.
+
+    Parameters
+    ----------
+    landsat_scene :
+        Scene directory or tar.gz file name
+
+    pool :
+        Directory containing the scene, if any
+
+    mapset :
+        Name of mapset to import to
+
+    multiple_scenes :
+        Boolean True or False, whether more than one scene is being imported
+
+    untarred :
+        Boolean True or False, whether the scene directory was unpacked from
+        a tar.gz file
+
+    read_from_tar :
+        Boolean True or False, whether to read the bands of tar.gz files via
+        GDAL's /vsitar/ instead of unpacking them
+
+    decompression_threads :
+        Number of threads to decompress a tar.gz file with, if supported, by
+        default as many as CPU cores
+
+    Returns
+    -------
+    tgis_timestamp :
+        A t.register compliant timestamp string or None, if only the content
+        of a tar.gz file is listed
+    """
+    if pool:  # requires the full path to the scene
+        landsat_scene = os.path.join(pool, landsat_scene)
+
+    geotiff_sources = None
+    if 'tar.gz' in landsat_scene:
+        if list_bands:
+            files_in_tar = list_files_in_tar(landsat_scene)
+            return None
+
+        elif read_from_tar or list_timestamps:  # -t requires the MTL only
+            landsat_scene, geotiff_sources = unpack_metadata(landsat_scene)
+            untarred = True
+
+        else:
+            landsat_scene, untarred = unpack_scene(
+                    landsat_scene,
+                    decompression_threads,
+            )
+
+    # listing bands requires a timestamp only to write in tgis_output
+    timestamp = None
+    tgis_timestamp = str()
+    if not list_bands or tgis_output:
+        timestamp = get_timestamp(
+                        scene=landsat_scene,
+                        skip_microseconds=skip_microseconds,
+                    )
+        # date_time = validate_date_time_string(date_time)
+        tgis_timestamp = build_tgis_timestamp(
+                            prefix=prefix,
+                            scene=os.path.basename(landsat_scene),
+                            timestamp=timestamp,
+                        )
+
+    # listing timestamps requires nothing else
+    if not list_timestamps:
+        band_filenames = retrieve_band_filenames(
+                            bands=list(bands),
+                            spectral_sets=spectral_sets,
+                            scene=landsat_scene,
+                            filenames=geotiff_sources,
+                            )
+        import_geotiffs(
+                scene=landsat_scene,
+                band_filenames=band_filenames,
+                mapset=mapset,
+                memory=memory,
+                override_projection=override_projection,
+                prefix=prefix,
+                link_geotiffs=link_geotiffs,
+                skip_import=skip_import,
+                single_mapset=single_mapset,
+                list_bands=list_bands,
+                list_timestamps=list_timestamps,
+                tgis_output=tgis_output,
+                timestamp=timestamp,
+                force_timestamp=force_timestamp,
+                do_not_timestamp=do_not_timestamp,
+                skip_microseconds=skip_microseconds,
+                copy_mtl=copy_mtl,
+                geotiff_sources=geotiff_sources,
+        )
+
+    if remove_untarred and untarred:
+        message = f'Removing unpacked source directory {landsat_scene}'
+        grass.verbose(_(message))
+        shutil.rmtree(landsat_scene)
+
+    if (
+            not list_timestamps
+            and not is_mtl_in_cell_misc(mapset)
+            and multiple_scenes
+    ):
+        message = HORIZONTAL_LINE
+        g.message(_(message))
+
+    return tgis_timestamp
+
 def main():
 
     # flags
@@ -254,11 +420,14 @@ def main():
     copy_mtl = not flags['c']
     link_geotiffs = flags['e']
     skip_import = flags['s']
+    read_from_tar = flags['z']
     remove_untarred = flags['r']
     force_timestamp = flags['f']
     do_not_timestamp = flags['d']
     skip_microseconds = flags['m']
     single_mapset = flags['1']
+    if list_timestamps:  # verbose if -t instructed
+        os.environ['GRASS_VERBOSE'] = GRASS_VERBOSITY_LELVEL_3
     if single_mapset:
         mapset = options['mapset']
     else:
@@ -272,16 +441,24 @@ def main():
     spectral_sets = options['set'].split(',')
     timestamp = options['timestamp']
     tgis_output = options['tgis_output']
-    memory = options['memory']
+    memory = int(options['memory'])
+    nprocs = int(options['nprocs'])
     if (memory != MEMORY_DEFAULT):
-        message = HORIZONTAL_LINE
-        message += (f'Cache size set to {memory} MB\n')
-        message += HORIZONTAL_LINE
+        message = f'{HORIZONTAL_LINE}Cache size set to {memory} MB\n{HORIZONTAL_LINE}'
         grass.verbose(_(message))
 
     if pool:  # import all scenes from pool
-        landsat_scenes, files = [item for item in os.walk(pool)][0][1:]
-        landsat_scenes += files
+        # top-level entries only: scene directories, then tar.gz files
+        with os.scandir(pool) as entries:
+            entries = [
+                    entry for entry in entries
+                    if not entry.name.startswith('.')
+            ]
+        landsat_scenes = [entry.name for entry in entries if entry.is_dir()]
+        landsat_scenes += [
+                entry.name for entry in entries
+                if not entry.is_dir() and entry.name.endswith(TGZ_EXTENSION)
+        ]
         if count_scenes:
             count = len(landsat_scenes)
             message = f'Number of scenes in pool: {count}'
@@ -294,70 +471,98 @@ def main():
     message_list_timestamps = MESSAGE_LIST_TIMESTAMPS_HEADLINE
     timestamps = []
 
-    for landsat_scene in landsat_scenes:
-        if pool:  # requires the full path to the scene
-            landsat_scene = os.path.join(pool, landsat_scene)
-
-        if 'tar.gz' in landsat_scene:
-            if list_bands:
-                files_in_tar = list_files_in_tar(landsat_scene)
-                break  # FIXME -- Will list only first tgz file!
-
-            else:
-                extract_tgz(landsat_scene)
-                landsat_scene = landsat_scene.split('.tar.gz')[0]
-                message = f'Scene {scene} decompressed and unpacked'
-                grass.verbose(_(message))
-
-        timestamp = get_timestamp(
-                        scene=landsat_scene,
-                        skip_microseconds=skip_microseconds,
-                    )
-        # date_time = validate_date_time_string(date_time)
-        tgis_timestamp = build_tgis_timestamp(
-                            prefix=prefix,
-                            scene=os.path.basename(landsat_scene),
-                            timestamp=timestamp,
-                        )
-        timestamps.append(tgis_timestamp)
+    # scenes are independent of each other when imported in their own Mapset
+    workers = min(nprocs or os.cpu_count() or 1, len(landsat_scenes))
+    import_in_parallel = (
+            not single_mapset
+            and not list_bands
+            and workers > 1
+    )
+
+    # share the cache memory among concurrently imported scenes
+    if import_in_parallel:
+        memory = max(memory // workers, 1)
+
+    import_parameters = dict(
+            pool=pool,
+            mapset=mapset,
+            memory=memory,
+            bands=bands,
+            spectral_sets=spectral_sets,
+            prefix=prefix,
+            list_bands=list_bands,
+            list_timestamps=list_timestamps,
+            tgis_output=tgis_output,
+            override_projection=override_projection,
+            copy_mtl=copy_mtl,
+            link_geotiffs=link_geotiffs,
+            skip_import=skip_import,
+            remove_untarred=remove_untarred,
+            force_timestamp=force_timestamp,
+            do_not_timestamp=do_not_timestamp,
+            skip_microseconds=skip_microseconds,
+            single_mapset=single_mapset,
+            multiple_scenes=len(landsat_scenes) > 1,
+            read_from_tar=read_from_tar,
+    )
+
+    if import_in_parallel:
+        message = f'Importing {len(landsat_scenes)} scenes using {workers} processes'
+        grass.verbose(_(message))
 
-        band_filenames = retrieve_band_filenames(
-                            bands=bands,
-                            spectral_sets=spectral_sets,
-                            scene=landsat_scene,
-                            )
-        import_geotiffs(
-                scene=landsat_scene,
-                band_filenames=band_filenames,
-                mapset=mapset,
-                memory=memory,
-                override_projection=override_projection,
-                prefix=prefix,
-                link_geotiffs=link_geotiffs,
-                skip_import=skip_import,
-                single_mapset=single_mapset,
-                list_bands=list_bands,
-                list_timestamps=list_timestamps,
-                tgis_output=tgis_output,
-                timestamp=timestamp,
-                force_timestamp=force_timestamp,
-                do_not_timestamp=do_not_timestamp,
-                skip_microseconds=skip_microseconds,
-                copy_mtl=copy_mtl,
+        # share the CPU cores among concurrent decompressions
+        import_parameters['decompression_threads'] = max(
+                (os.cpu_count() or 1) // workers,
+                1,
         )
-
-        if remove_untarred:
-            message = f'Removing unpacked source directory {scene}'
-            grass.verbose(_(message))
-            shutil.rmtree(scene)
-
-        if (
-                not list_timestamps
-                and not is_mtl_in_cell_misc(mapset)
-                and (len(landsat_scenes) > 1)
-        ):
-            message = HORIZONTAL_LINE
-            g.message(_(message))
+        gisrc_directory = tempfile.mkdtemp()
+        try:
+            with ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=isolate_gisrc,
+                    initargs=(gisrc_directory,),
+            ) as executor:
+                timestamps = list(
+                        executor.map(
+                            partial(import_scene, **import_parameters),
+                            landsat_scenes,
+                        )
+                )
+        finally:
+            shutil.rmtree(gisrc_directory, ignore_errors=True)
+
+    elif (
+            list_bands
+            or list_timestamps
+            or read_from_tar
+            or len(landsat_scenes) == 1
+    ):
+        for landsat_scene in landsat_scenes:
+            tgis_timestamp = import_scene(landsat_scene, **import_parameters)
+            if tgis_timestamp is None:
+                break  # FIXME -- Will list only first tgz file!
+            timestamps.append(tgis_timestamp)
+
+    else:  # import sequentially while unpacking ahead, clean up behind
+        import_parameters['pool'] = None
+        import_parameters['remove_untarred'] = False
+        removals = []
+        with ThreadPoolExecutor(max_workers=1) as cleanup:
+            for landsat_scene, untarred in unpack_scenes_ahead(landsat_scenes, pool):
+                tgis_timestamp = import_scene(
+                        landsat_scene,
+                        untarred=untarred,
+                        **import_parameters,
+                )
+                timestamps.append(tgis_timestamp)
+
+                if remove_untarred and untarred:
+                    message = f'Removing unpacked source directory {landsat_scene}'
+                    grass.verbose(_(message))
+                    removals.append(cleanup.submit(shutil.rmtree, landsat_scene))
+
+        for removal in removals:
+            removal.result()  # raise removal errors, if any
 
     if list_timestamps:
         for timestamp in timestamps:
@@ -142,6 +142,7 @@ BAND_PRECOLLECTION_RE = '[0-9Q][01A]?'
 BAND_RE = '[0-9Q][01A]?'
 BAND_RE_TEMPLATE = '(?P<band>B{band_pattern})'
 GEOTIFF_EXTENSION = '.TIF'
+TGZ_EXTENSION = '.tar.gz'
 
 PRECOLLECTION_SCENE_ID = LANDSAT_PREFIX \
         + SENSOR_PRECOLLECTION_RE \
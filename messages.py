@@ -1,2 +1,4 @@
 MESSAGE_UNKNOWN_LANDSAT_IDENTIFIER='The identifier {scene} does not match any known Landsat product file name pattern!'
 MESSAGE_LIST_TIMESTAMPS_HEADLINE='Date\t\tTime\t\tTimezone\n'
+MESSAGE_EXISTS_OVERWRITING='\t [ Exists, overwriting]'
+MESSAGE_EXISTS_SKIPPING='\t [ Exists, skipping ]'
@@ -1,6 +1,6 @@
 import os
 import shutil
-import glob
+from functools import lru_cache
 import grass.script as grass
 from grass.pygrass.modules.shortcuts import general as g
 from constants import HORIZONTAL_LINE
@@ -9,7 +9,9 @@ from constants import HORIZONTAL_LINE
 grass_environment = grass.gisenv()
 GISDBASE = grass_environment['GISDBASE']
 LOCATION = grass_environment['LOCATION_NAME']
+CELL = 'cell'
 CELL_MISC = 'cell_misc'
+MTL_FILENAME_SUFFIX = 'MTL.txt'
 
 
 def get_path_to_cell_misc(mapset):
@@ -19,35 +21,53 @@ def get_path_to_cell_misc(mapset):
     path_to_cell_misc = '/'.join([GISDBASE, LOCATION, mapset, CELL_MISC])
     return path_to_cell_misc
 
+def list_rasters_in_mapset(mapset):
+    """
+    Return the names of the raster maps inside the requested Mapset, as
+    'g.list type=raster' would, by reading its cell directory
+    """
+    path_to_cell = '/'.join([GISDBASE, LOCATION, mapset, CELL])
+    try:
+        with os.scandir(path_to_cell) as entries:
+            return frozenset(entry.name for entry in entries)
+
+    except FileNotFoundError:  # no raster maps yet
+        return frozenset()
+
+@lru_cache(maxsize=None)
 def get_metafile(scene):
     """
     Get metadata MTL filename
     """
-    metafile = str()
-    if glob.glob(scene + '/*MTL.txt') == []:
+    with os.scandir(scene) as entries:
+        metafile = next(
+                (entry.path for entry in entries
+                    if entry.name.endswith(MTL_FILENAME_SUFFIX)
+                    and not entry.name.startswith('.')),
+                None,
+        )
+    if not metafile:
         # grass.warning(_("Found an empty scene directory! Passing..."))
-        message = "Missing 'MTL' metadata file!"
-        message += f' Skipping import process for scene {scene}.'
+        message = f"Missing 'MTL' metadata file! Skipping import process for scene {scene}."
         grass.fatal(_(message))
-    else:
-        metafile = glob.glob(scene + '/*MTL.txt')[0]
-        metafile_basename = os.path.basename(metafile)
-        scene_basename = os.path.basename(scene)
     return metafile
 
-def is_mtl_in_cell_misc(mapset):
+def get_cell_misc_state(mapset):
     """
-    To implement -- confirm existence of copied MTL in cell_misc instead of
-    saying "yes, it's copied" without checking
+    Return the path to the cell_misc directory inside the requested Mapset
+    and whether the copied MTL file exists in it
     """
-    cell_misc_directory = get_path_to_cell_misc(mapset)
-    globbing = glob.glob(cell_misc_directory + '/' + mapset + '_MTL.txt')
-
-    if not globbing:
-        return False
+    path_to_cell_misc = get_path_to_cell_misc(mapset)
+    mtl_filename = mapset + '_' + MTL_FILENAME_SUFFIX
+    mtl_exists = os.path.exists(os.path.join(path_to_cell_misc, mtl_filename))
+    return path_to_cell_misc, mtl_exists
 
-    else:
-        return True
+def is_mtl_in_cell_misc(mapset):
+    """
+    Confirm existence of the copied MTL file in the cell_misc directory of
+    the requested Mapset
+    """
+    return get_cell_misc_state(mapset)[1]
 
 def copy_mtl_in_cell_misc(
         scene,
@@ -63,25 +83,31 @@ def copy_mtl_in_cell_misc(
     """
     if single_mapset:
         mapset = mapset
-    path_to_cell_misc = get_path_to_cell_misc(mapset)
+    path_to_cell_misc, mtl_exists = get_cell_misc_state(mapset)
 
-    if is_mtl_in_cell_misc(mapset):
-        message = HORIZONTAL_LINE
-        message += f' MTL exists in: {path_to_cell_misc}\n'
-        message += HORIZONTAL_LINE
+    if mtl_exists:
+        message = f'{HORIZONTAL_LINE} MTL exists in: {path_to_cell_misc}\n{HORIZONTAL_LINE}'
 
     else:
         if copy_mtl:
             metafile = get_metafile(scene)
-            shutil.copy(metafile, path_to_cell_misc)
-            if glob.glob(path_to_cell_misc):
-                # copy the metadata file -- Better: check if really copied!
-                message = HORIZONTAL_LINE
-                message += f' MTL file copied at: {path_to_cell_misc}\n'
-                message += HORIZONTAL_LINE
+            os.makedirs(path_to_cell_misc, exist_ok=True)
+            mtl_in_cell_misc = os.path.join(
+                    path_to_cell_misc,
+                    os.path.basename(metafile),
+            )
+            # hard-link on the same file system, else copy
+            try:
+                os.link(metafile, mtl_in_cell_misc)
+
+            except FileExistsError:  # re-run, linked or copied before
+                if not os.path.samefile(metafile, mtl_in_cell_misc):
+                    shutil.copyfile(metafile, mtl_in_cell_misc)
+
+            except OSError:
+                shutil.copyfile(metafile, mtl_in_cell_misc)
+            message = f'{HORIZONTAL_LINE} MTL file copied at: {path_to_cell_misc}\n{HORIZONTAL_LINE}'
         else:
-            message = HORIZONTAL_LINE
-            message += f' MTL not transferred to: {path_to_cell_misc}\n'
-            message += HORIZONTAL_LINE
+            message = f'{HORIZONTAL_LINE} MTL not transferred to: {path_to_cell_misc}\n{HORIZONTAL_LINE}'
 
     g.message(_(message))
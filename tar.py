@@ -1,7 +1,25 @@
+import gzip
+import io
 import os
+import shutil
+import subprocess
 import tarfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import grass.script as grass
+from constants import GZIP_READ_BUFFER_SIZE
+from constants import TAR_COPY_BUFFER_SIZE
+from constants import UNPACK_AHEAD_SCENES
+from constants import VSITAR_PREFIX
+from identifiers import GEOTIFF_EXTENSION
 from grass.pygrass.modules.shortcuts import general as g
 
+# optional, parallel gzip decompression
+try:
+    import rapidgzip
+except ImportError:
+    rapidgzip = None
+
 
 def list_files_in_tar(tgz):
     """List files in tar.gz file"""
@@ -9,32 +27,150 @@ def list_files_in_tar(tgz):
     g.message(_(f'Reading compressed scene \'{compressed_scene}\'...'))
     tar = tarfile.TarFile.open(name=tgz, mode='r')
     members = tar.getnames()
-    members = """
-    {}
-    """.format('\n'.join(members[1:]))
-    index_of_dot = compressed_scene.index('.')
-    scene = compressed_scene[:index_of_dot]
-    message = f'List of files in {scene}'
-    message += members
+    members = '\n'.join(members[1:])
+    scene = compressed_scene.partition('.')[0]
+    message = f'List of files in {scene}\n    {members}\n    '
     g.message(_(message))
 
-def extract_tgz(tgz):
+def unpack_tar_stream(fileobj, path):
     """
-    Decompress and unpack a .tgz file
+    Unpack an uncompressed tar stream, in one pass, inside 'path'
     """
-    tar = tarfile.TarFile.open(name=tgz, mode='r')
-    tgz_base = os.path.basename(tgz).split('.tar.gz')[0]
+    with tarfile.open(
+            fileobj=fileobj,
+            mode='r|',
+            copybufsize=TAR_COPY_BUFFER_SIZE,
+    ) as tar:
+        tar.extractall(path=path)
 
-    # try to create a directory with the scene's (base)name
-    # source: <http://stackoverflow.com/a/14364249/1172302>
-    try:
-        os.makedirs(tgz_base)
+def extract_tgz(tgz, threads=None):
+    """
+    Decompress and unpack a .tgz file, return the scene directory
 
-    except OSError:
-        if not os.path.isdir(tgz_base):
-            raise
+    Decompression uses, in order of preference, the multi-threaded
+    'rapidgzip' module or 'pigz' program, if available, or else Python's
+    own single-threaded gzip support.  The 'rapidgzip' module uses up to
+    'threads' threads, by default as many as CPU cores.
+    """
+    tgz_base = os.path.basename(tgz).split('.tar.gz')[0]
+
+    # create a directory with the scene's (base)name
+    os.makedirs(tgz_base, exist_ok=True)
 
     # extract files indide the scene directory
     compressed_scene = os.path.basename(tgz)
     g.message(_(f'Extracting files from compressed_scene {compressed_scene}'))
-    tar.extractall(path=tgz_base)
+
+    if rapidgzip:
+        with rapidgzip.open(
+                tgz,
+                parallelization=threads or os.cpu_count() or 1,
+        ) as decompressed:
+            unpack_tar_stream(decompressed, tgz_base)
+        return tgz_base
+
+    # decompress in a separate process, unpack in this one
+    pigz = shutil.which('pigz')
+    if pigz:
+        with subprocess.Popen(
+                [pigz, '--decompress', '--stdout', tgz],
+                stdout=subprocess.PIPE,
+        ) as decompression:
+            unpack_tar_stream(decompression.stdout, tgz_base)
+
+        if decompression.returncode:
+            message = f'Failed to decompress {compressed_scene} using pigz'
+            grass.fatal(_(message))
+
+        return tgz_base
+
+    # stream, in one pass, through a single large read buffer
+    with io.BufferedReader(
+            gzip.open(tgz, 'rb'),
+            buffer_size=GZIP_READ_BUFFER_SIZE,
+    ) as decompressed:
+        unpack_tar_stream(decompressed, tgz_base)
+
+    return tgz_base
+
+def unpack_metadata(tgz):
+    """
+    Unpack only the metadata files of a .tgz file, in one streaming pass,
+    and locate its GeoTIFF files for GDAL's /vsitar/ virtual file system.
+    The bands can, then, be imported without writing them on disk first.
+
+    Returns
+    -------
+    scene, geotiffs :
+        Scene directory holding the metadata files and a dictionary mapping
+        each GeoTIFF filename to its /vsitar/ path
+    """
+    tgz_base = os.path.basename(tgz).split('.tar.gz')[0]
+    os.makedirs(tgz_base, exist_ok=True)
+
+    compressed_scene = os.path.basename(tgz)
+    g.message(_(f'Extracting metadata from compressed_scene {compressed_scene}'))
+
+    tgz_path = os.path.abspath(tgz)
+    geotiffs = dict()
+    with tarfile.open(
+            name=tgz,
+            mode='r|gz',
+            bufsize=GZIP_READ_BUFFER_SIZE,
+            copybufsize=TAR_COPY_BUFFER_SIZE,
+    ) as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+
+            filename = os.path.basename(member.name)
+            if filename.endswith(GEOTIFF_EXTENSION):
+                member_path = os.path.normpath(member.name)
+                geotiffs[filename] = f'{VSITAR_PREFIX}{tgz_path}/{member_path}'
+
+            else:
+                tar.extract(member, path=tgz_base)
+
+    return tgz_base, geotiffs
+
+def unpack_scene(scene, threads=None):
+    """
+    Decompress and unpack a scene, if it is a tar.gz file, using up to
+    'threads' decompression threads, see extract_tgz()
+
+    Returns
+    -------
+    scene, untarred :
+        Scene directory and whether it was unpacked from a tar.gz file
+    """
+    if 'tar.gz' not in scene:
+        return scene, False
+
+    scene = extract_tgz(scene, threads)
+    message = f'Scene {scene} decompressed and unpacked'
+    grass.verbose(_(message))
+    return scene, True
+
+def unpack_scenes_ahead(scenes, pool=None, depth=UNPACK_AHEAD_SCENES):
+    """
+    Generate unpacked scenes, while decompressing and unpacking up to
+    'depth' upcoming tar.gz scenes in a separate process.  Extraction thus
+    overlaps with the import of the scene at hand, while the number of
+    unpacked scenes on disk remains bounded.
+
+    Yields
+    ------
+    scene, untarred :
+        See unpack_scene()
+    """
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=1) as executor:
+        for scene in scenes:
+            if pool:  # requires the full path to the scene
+                scene = os.path.join(pool, scene)
+            pending.append(executor.submit(unpack_scene, scene))
+            if len(pending) > depth:
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
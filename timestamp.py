@@ -2,11 +2,33 @@ from constants import MONTHS
 from constants import DATE_STRINGS
 from constants import TIME_STRINGS
 from constants import ZERO_TIMEZONE
-from constants import GRASS_VERBOSITY_LELVEL_3
+import mmap
 import os
+from functools import lru_cache
 import grass.script as grass
 from metadata import get_metafile
+from metadata import get_path_to_cell_misc
 from datetime import datetime
+import re
+
+TIMESTAMP_FILENAME = 'timestamp'
+
+# compiled once, scanned over the (memory-mapped) bytes of a metadata file
+# keys match as a whole, at the start of a 'KEY = value' line, ending in LF
+# or CRLF
+TIMESTAMP_RE = re.compile(
+        (
+            r'^[ \t]*(?:'
+            r'(?:{date_keys})[ \t]*=[ \t]*"?(?P<date>[0-9-]+)"?'
+            r'|'
+            r'(?:{time_keys})[ \t]*=[ \t]*"?(?P<time>[0-9:.]+)(?P<zulu>Z?)"?[ \t]*\r?$'
+            r')'
+        ).format(
+            date_keys='|'.join(DATE_STRINGS),
+            time_keys='|'.join(TIME_STRINGS),
+        ).encode(),
+        re.MULTILINE,
+)
 
 
 def validate_date_string(date_string):
@@ -33,14 +55,6 @@ def validate_time_string(time_string):
     except ValueError:
         raise ValueError("Incorrect data format, should be HH:MM:SS.ssssss")
 
-def add_leading_zeroes(real_number, n):
-     """
-     Add leading zeroes to floating point numbers
-     Source: https://stackoverflow.com/a/7407943
-     """
-     bits = real_number.split('.')
-     return '{integer}.{real}'.format(integer=bits[0].zfill(n), real=bits[1])
-
 def get_timestamp(scene, skip_microseconds=False):
     """
     Scope:  Retrieve timestamp of a Landsat scene
@@ -48,65 +62,88 @@ def get_timestamp(scene, skip_microseconds=False):
     Output: Return date, time and timezone of acquisition
     """
     metafile = get_metafile(scene)
-    date_time = dict()
-
-    try:
-        metadata = open(metafile)
+    status = os.stat(metafile)
+    metafile_key = (metafile, status.st_mtime_ns, status.st_size)
+    date_time = parse_timestamp(metafile_key, skip_microseconds)
+    return dict(date_time)
 
-        for line in metadata.readlines():
-            line = line.rstrip('\n')
-
-            if len(line) == 0:
-                continue
+def scan_metadata(metafile, pattern, fields):
+    """
+    Scan the memory-mapped content of a metadata file, without reading it
+    into a string, for the named groups 'fields' of a bytes pattern. The
+    scan stops as soon as all fields are found.
 
-            # get Date
-            if any(x in line for x in DATE_STRINGS):
-                date_time['date'] = line.strip().split('=')[1].strip()
-                validate_date_string(date_time['date'])
+    Returns
+    -------
+    A dictionary with the decoded value of each field found first
+    """
+    values = dict()
+    with open(metafile, 'rb') as metadata:
+        if not os.fstat(metadata.fileno()).st_size:  # can't map empty files
+            return values
+
+        with mmap.mmap(metadata.fileno(), 0, access=mmap.ACCESS_READ) as text:
+            for match in pattern.finditer(text):
+                for field, value in match.groupdict().items():
+                    if value is not None and field not in values:
+                        values[field] = value.decode()
+                if all(field in values for field in fields):
+                    break
+    return values
+
+@lru_cache(maxsize=512)
+def parse_timestamp(metafile_key, skip_microseconds=False):
+    """
+    Scope:  Parse the timestamp out of a Landsat metadata file
+    Input:  Tuple of the *MTL.txt file name, its modification time in
+            nanoseconds and size
+    Output: Return date, time and timezone of acquisition
 
-            # get Time
-            if any(x in line for x in TIME_STRINGS):
+    Results are cached per process. The modification time and size in the
+    key invalidate the cache whenever the metadata file changes.
+    """
+    metafile = metafile_key[0]
+    date_time = dict()
 
-                # remove " from detected line
-                if('\"' in line):
-                    line = line.replace('\"', '')
+    metadata = scan_metadata(metafile, TIMESTAMP_RE, ('date', 'time'))
 
-                # first, zero timezone if 'Z' is the last character
-                if line.endswith('Z'):
-                    date_time['timezone'] = ZERO_TIMEZONE
+    # get Date
+    if 'date' in metadata:
+        date_time['date'] = metadata['date']
+        validate_date_string(date_time['date'])
 
-                # remove 'Z' and split the string before & after '='
-                translation_table = str.maketrans('', '', 'Z')
-                time = line.strip().split('=')[1].strip().translate(translation_table)
+    # get Time
+    if 'time' in metadata:
+        time, zulu = metadata['time'], metadata['zulu']
 
-                # split string, convert to int later -- This Is Not Right
-                hours, minutes, seconds = time.split('.')[0].split(':')
+        # first, zero timezone if 'Z' is the last character
+        if zulu:
+            date_time['timezone'] = ZERO_TIMEZONE
 
-                if not skip_microseconds:
-                    # round microseconds to six digits!
-                    microseconds = float(time.split('.')[1])
-                    microseconds = round((microseconds / 10000000), 6)
+        # split string, convert to int later -- This Is Not Right
+        time, _separator, fraction = time.partition('.')
+        hours, minutes, seconds = time.split(':')
 
-                    # add to seconds
-                    seconds = int(seconds)
-                    seconds += microseconds
-                    seconds = format(seconds, '.6f')
-                    seconds = add_leading_zeroes(seconds, 2)
+        if not skip_microseconds:
+            # round microseconds to six digits!
+            microseconds = float(fraction or 0)
+            microseconds = round((microseconds / 10000000), 6)
 
-                if float(seconds) < 10:
-                    seconds = seconds.split('.')[0]
+            # add to seconds, zero-padded to two integer digits
+            seconds = int(seconds)
+            seconds += microseconds
+            seconds = format(seconds, '09.6f')
 
-                time = ':'.join([hours, minutes, str(seconds)])
-                validate_time_string(time)
-                time = time.split(':')
+        if float(seconds) < 10:
+            seconds = seconds.split('.')[0]
 
-                # create hours, minutes, seconds in date_time dictionary
-                date_time['hours'] = format(int(hours), '02d')
-                date_time['minutes'] = format(int(minutes), '02d')
-                date_time['seconds'] = seconds # float?
+        time = f'{hours}:{minutes}:{seconds}'
+        validate_time_string(time)
 
-    finally:
-        metadata.close()
+        # create hours, minutes, seconds in date_time dictionary
+        date_time['hours'] = format(int(hours), '02d')
+        date_time['minutes'] = format(int(minutes), '02d')
+        date_time['seconds'] = seconds # float?
 
     return date_time
 
@@ -140,12 +177,9 @@ def build_tgis_timestamp(
     date_Ymd = datetime.strptime(date, "%Y-%m-%d")
     date_tgis = datetime.strftime(date_Ymd, "%d %b %Y")
 
-    hours = str(timestamp['hours'])
-    minutes = str(timestamp['minutes'])
-    seconds = str(timestamp['seconds'])
     timezone = timestamp['timezone']
 
-    time = ':'.join((hours, minutes, seconds))
+    time = f"{timestamp['hours']}:{timestamp['minutes']}:{timestamp['seconds']}"
     string_parse_time = "%H:%M:%S"
     if '.' not in time:
         time += '.000000'
@@ -154,14 +188,10 @@ def build_tgis_timestamp(
     time = datetime.strptime(time, string_parse_time)
     time = datetime.strftime(time, string_parse_time)
 
-    tgis_timestamp = str()
     # if not list_timestamps:
     #     tgis_timestamp += f'\t{date}\t{time} {timezone}\n\n'
 
-    # else:
-    #     # verbose if -t instructed
-    os.environ['GRASS_VERBOSE'] = GRASS_VERBOSITY_LELVEL_3
-    tgis_timestamp += f'{prefix}{scene}|{date_tgis} {time} {timezone}'
+    tgis_timestamp = f'{prefix}{scene}|{date_tgis} {time} {timezone}'
 
     return tgis_timestamp
 
@@ -172,12 +202,9 @@ def simple_timestamp(timestamp):
     date_Ymd = datetime.strptime(date, "%Y-%m-%d")
     date_tgis = datetime.strftime(date_Ymd, "%d %b %Y")
 
-    hours = str(timestamp['hours'])
-    minutes = str(timestamp['minutes'])
-    seconds = str(timestamp['seconds'])
     timezone = timestamp['timezone']
 
-    time = ':'.join((hours, minutes, seconds))
+    time = f"{timestamp['hours']}:{timestamp['minutes']}:{timestamp['seconds']}"
     string_parse_time = "%H:%M:%S"
     if '.' not in time:
         time += '.000000'
@@ -185,32 +212,47 @@ def simple_timestamp(timestamp):
         string_parse_time += ".%f"
     time = datetime.strptime(time, string_parse_time)
     time = datetime.strftime(time, string_parse_time)
-    return ' '.join((date, time, timezone))
+    return f'{date} {time} {timezone}'
 
 
 def build_r_timestamp(timestamp):
     """
+    Build a timestamp string as GRASS itself formats it, for example
+    '3 Apr 2018 09:10:20.674074', which is also valid input to r.timestamp
     """
     if isinstance(timestamp, dict):
         # year, month, day
         if ('-' in timestamp['date']):
             year, month, day = timestamp['date'].split('-')
         # else, if not ('-' in timestamp['date']): what?
-        month = MONTHS[month]
-        day_month_year = ' '.join((day, month, year))
-        # hours, minutes, seconds
-        hours = str(timestamp['hours'])
-        minutes = str(timestamp['minutes'])
-        seconds = str(timestamp['seconds'])
-        hours_minutes_seconds = ':'.join((hours, minutes, seconds))
-        # assembly the string
-        timestamp = ' '.join((day_month_year, hours_minutes_seconds))
+        month = MONTHS[int(month)]
+        # assembly the string: day month year hours:minutes:seconds
+        timestamp = (
+                f"{int(day)} {month} {int(year)} "
+                f"{timestamp['hours']}:{timestamp['minutes']}:{timestamp['seconds']}"
+        )
     return timestamp
 
-def set_timestamp(band, timestamp):
+def set_timestamp(band, timestamp, mapset=None):
     """
     Builds and sets the timestamp (as a string!) for a raster map
+
+    If the raster map's Mapset is given, the timestamp file is written
+    directly in its cell_misc directory, as r.timestamp does, sparing a
+    module call per band.
     """
     timestamp = build_r_timestamp(timestamp)
+    if mapset:
+        path_to_band_misc = os.path.join(get_path_to_cell_misc(mapset), band)
+        try:
+            os.makedirs(path_to_band_misc, exist_ok=True)
+            timestamp_file = os.path.join(path_to_band_misc, TIMESTAMP_FILENAME)
+            with open(timestamp_file, 'w') as output_file:
+                output_file.write(f'{timestamp}\n')
+            return
+
+        except OSError:
+            pass
+
     # stamp bands
     grass.run_command('r.timestamp', map=band, date=timestamp, verbose=True)